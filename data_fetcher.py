@@ -2,6 +2,8 @@
 
 import akshare as ak
 import logging
+import numpy as np
+import pandas as pd
 import talib as tl
 
 import concurrent.futures
@@ -35,3 +37,61 @@ def run(stocks):
                 print('%s(%r) generated an exception: %s' % (stock[1], stock[0], exc))
 
     return stocks_data
+
+
+# 向量化策略用到的列，均为float64：策略按阈值（涨幅>=2%、成交额>=2亿等）筛选，
+# 降为float32会改变临界值附近的选股结果；成交量可能缺失（nan），转为整数会把nan变成0，
+# 使5日均量偏低，与按DataFrame计算的结果不一致
+COLUMNS = ['开盘', '收盘', '成交量', 'p_change']
+
+
+# 按列策略需要的最大交易日数：放量上涨取end前threshold+1=61日，均线多头取30日内首日的MA30，共30+29=59日
+WINDOW = 61
+
+
+# 将{股票: DataFrame}按列堆叠为(股票, 交易日)二维数组，各策略共享
+# 每只股票只保留end_date当日及之前的最后window个交易日，左对齐，不足部分填nan；
+# end为保留的交易日数量，历史足够的股票即为window
+# gaps[列]标记该列在end_date之前（含窗口外）首个有效值之后是否出现过nan，见utils.has_gap
+# 所有股票先拼接为一个DataFrame，再按下标一次取出全部窗口，避免逐只股票取列、切片
+def to_columns(stocks_data, end_date=None, window=WINDOW):
+    code_names = list(stocks_data.keys())
+    count = len(code_names)
+    columns = {'code_names': code_names, 'end': np.zeros(count, dtype=np.int64), 'gaps': {}}
+    if count == 0:
+        for column in COLUMNS:
+            columns[column] = np.full((0, window), np.nan)
+            columns['gaps'][column] = np.zeros(0, dtype=np.bool_)
+        return columns
+
+    merged = pd.concat(stocks_data.values(), ignore_index=True)
+    lengths = np.array([len(data) for data in stocks_data.values()], dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    if end_date is None:
+        ends = lengths
+    else:
+        # 每只股票的日期按升序排列，二分查找end_date当日及之前的交易日数量
+        dates = merged['日期'].to_numpy()
+        ends = np.array([np.searchsorted(dates[offset:offset + length], end_date, side='right')
+                         for offset, length in zip(offsets, lengths)], dtype=np.int64)
+    starts = np.maximum(ends - window, 0)
+    columns['end'] = ends - starts
+
+    days = np.arange(window)
+    in_window = days < columns['end'][:, None]
+    index = np.where(in_window, (offsets + starts)[:, None] + days, 0)
+
+    # 拼接后每个位置是否在所属股票的end_date之前
+    before_end = np.arange(len(merged)) - np.repeat(offsets, lengths) < np.repeat(ends, lengths)
+    for column in COLUMNS:
+        values = merged[column].to_numpy(dtype=np.float64)
+        columns[column] = np.where(in_window, values[index], np.nan)
+
+        # 缺失值之前本股票已出现过有效值即为gap
+        missing = np.isnan(values)
+        valid_seen = np.cumsum(~missing)
+        valid_seen -= np.repeat(valid_seen[offsets] - ~missing[offsets], lengths)
+        gaps = missing & (valid_seen > 0) & before_end
+        columns['gaps'][column] = np.logical_or.reduceat(gaps, offsets)
+
+    return columns
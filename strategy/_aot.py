@@ -0,0 +1,48 @@
+# -*- encoding: UTF-8 -*-
+
+# 预编译内核（见strategy/_compiled.py）的加载
+# 需设置环境变量SEQUOIA_AOT=1才会启用，且仅当编译时记录的源码摘要与当前源码一致时使用，
+# 否则退回JIT版本：预编译版本各股票串行计算，而JIT版本并行，缓存预热后JIT更快
+import hashlib
+import logging
+import os
+
+ENV_FLAG = 'SEQUOIA_AOT'
+
+_STRATEGY_DIR = os.path.dirname(os.path.abspath(__file__))
+_ROOT_DIR = os.path.dirname(_STRATEGY_DIR)
+# 内核及其输入类型所在的源码，任一改动都会使预编译结果失效
+SOURCES = (
+    os.path.join(_STRATEGY_DIR, 'enter.py'),
+    os.path.join(_STRATEGY_DIR, 'keep_increasing.py'),
+    os.path.join(_STRATEGY_DIR, '_compiled.py'),
+    os.path.join(_ROOT_DIR, 'data_fetcher.py'),
+    os.path.join(_ROOT_DIR, 'utils.py'),
+)
+DIGEST_FILE = os.path.join(_STRATEGY_DIR, 'strategy_kernels.sha256')
+
+
+def source_digest():
+    sha = hashlib.sha256()
+    for path in SOURCES:
+        with open(path, 'rb') as file:
+            sha.update(file.read())
+    return sha.hexdigest()
+
+
+def load(name, jit_kernel):
+    if os.environ.get(ENV_FLAG) != '1':
+        return jit_kernel
+
+    try:
+        with open(DIGEST_FILE, 'r') as file:
+            digest = file.read().strip()
+        from strategy import strategy_kernels
+    except (OSError, ImportError):
+        logging.warning("未找到预编译内核{}，使用JIT版本".format(name))
+        return jit_kernel
+
+    if digest != source_digest():
+        logging.warning("预编译内核{}与当前源码不一致，使用JIT版本，请重新执行 python -m strategy._compiled".format(name))
+        return jit_kernel
+    return getattr(strategy_kernels, name)
@@ -0,0 +1,32 @@
+# -*- encoding: UTF-8 -*-
+
+# 预编译放量上涨、均线多头两个策略的内核（按列版本及按DataFrame逐只计算的版本），
+# 避免每次运行时的JIT编译及缓存加载开销；其他策略不使用numba
+# 部署时执行：python -m strategy._compiled
+# 生成的strategy_kernels扩展模块及源码摘要位于strategy目录下，设置SEQUOIA_AOT=1后启用（见strategy/_aot.py）
+# 注意：预编译版本不支持parallel，各股票串行计算
+import os
+
+from numba.pycc import CC
+
+from strategy import _aot, enter, keep_increasing
+
+# 与data_fetcher.to_columns输出的数组类型一致
+COLUMN = 'f8[:, ::1]'
+END = 'i8[::1]'
+# 与enter.check_volume、keep_increasing.check传入的单只股票数组一致
+SERIES = 'f8[:]'
+
+cc = CC('strategy_kernels')
+cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+
+cc.export('scan_volume_nb', 'b1[:]({0}, {0}, {0}, {0}, {1}, i8)'.format(COLUMN, END))(
+    enter._scan_volume_nb.py_func)
+cc.export('scan_nb', 'b1[:]({0}, {1}, i8)'.format(COLUMN, END))(keep_increasing._scan_nb.py_func)
+cc.export('check_volume_nb', 'b1({0}, {0}, {0}, {0}, i8, i8)'.format(SERIES))(enter._check_volume_nb.py_func)
+cc.export('check_nb', 'b1({0}, i8, i8)'.format(SERIES))(keep_increasing._check_nb.py_func)
+
+if __name__ == '__main__':
+    cc.compile()
+    with open(_aot.DIGEST_FILE, 'w') as file:
+        file.write(_aot.source_digest())
@@ -1,8 +1,11 @@
 # -*- encoding: UTF-8 -*-
 
 import talib as tl
+import numpy as np
 import pandas as pd
 import logging
+import utils
+from strategy import _aot
 
 
 # TODO 真实波动幅度（ATR）放大
@@ -76,44 +79,73 @@ def check_volume(code_name, data, end_date=None, threshold=60):
     if len(data) < threshold:
         logging.debug("{0}:样本小于250天...\n".format(code_name))
         return False
-    data['vol_ma5'] = pd.Series(tl.MA(data['成交量'].values, 5), index=data.index.values)
 
-    if end_date is not None:
-        mask = (data['日期'] <= end_date)
-        data = data.loc[mask]
-    if data.empty:
+    n = utils.end_index(data, end_date)
+    close = data['收盘'].to_numpy(dtype=np.float64)
+    vol = data['成交量'].to_numpy(dtype=np.float64)
+    p_change = data['p_change'].to_numpy(dtype=np.float64)
+    # 与原先talib计算的5日均量一致：成交量中间缺失时之后的均量均为nan，不入选
+    if utils.has_gap(vol[:n]):
         return False
-    p_change = data.iloc[-1]['p_change']
-    if p_change < 2 \
-            or data.iloc[-1]['收盘'] < data.iloc[-1]['开盘']:
-        return False
-    data = data.tail(n=threshold + 1)
-    if len(data) < threshold + 1:
-        logging.debug("{0}:样本小于{1}天...\n".format(code_name, threshold))
+    if not _check_volume(close, data['开盘'].to_numpy(dtype=np.float64), vol, p_change, n, threshold):
         return False
 
-    # 最后一天收盘价
-    last_close = data.iloc[-1]['收盘']
-    # 最后一天成交量
-    last_vol = data.iloc[-1]['成交量']
+    vol_ratio = vol[n - 1] / vol[n - 6:n - 1].mean()
+    msg = "*{0}\n量比：{1:.2f}\t涨幅：{2}%\n".format(code_name, vol_ratio, p_change[n - 1])
+    logging.debug(msg)
+    return True
+
 
-    amount = last_close * last_vol * 100
+# check_volume的按列版本，columns见data_fetcher.to_columns，返回每只股票是否入选
+def scan_volume(columns, threshold=60):
+    # 需要end前threshold+1个交易日
+    if threshold + 1 > columns['收盘'].shape[1]:
+        raise ValueError("threshold={}超出按列数据的窗口，请增大data_fetcher.to_columns的window".format(threshold))
+    hits = _scan_volume(columns['收盘'], columns['开盘'], columns['成交量'], columns['p_change'],
+                        columns['end'], threshold)
+    return hits & ~columns['gaps']['成交量']
+
+
+# 逐只股票并行执行_check_volume_nb
+@utils.njit(parallel=True, cache=True)
+def _scan_volume_nb(close, open_, vol, p_change, end, threshold):
+    hits = np.zeros(len(end), dtype=np.bool_)
+    for s in utils.prange(len(end)):
+        hits[s] = _check_volume_nb(close[s], open_[s], vol[s], p_change[s], end[s], threshold)
+    return hits
+
+
+# 按需使用预编译内核（见strategy/_aot.py），省去JIT编译时间
+_scan_volume = _aot.load('scan_volume_nb', _scan_volume_nb)
+
+
+# check_volume的数值部分，只取前n个交易日
+@utils.njit(cache=True)
+def _check_volume_nb(close, open_, vol, p_change, n, threshold):
+    if n == 0:
+        return False
+    last = n - 1
+    if p_change[last] < 2 or close[last] < open_[last]:
+        return False
+    if n < threshold + 1:
+        return False
 
     # 成交额不低于2亿
-    if amount < 200000000:
+    if close[last] * vol[last] * 100 < 200000000:
         return False
 
-    data = data.head(n=threshold)
+    # 前一交易日的5日均量
+    mean_vol = 0.0
+    for i in range(last - 5, last):
+        mean_vol += vol[i]
+    mean_vol /= 5
 
-    mean_vol = data.iloc[-1]['vol_ma5']
+    # 量比大于等于2
+    return vol[last] >= 2 * mean_vol
 
-    vol_ratio = last_vol / mean_vol
-    if vol_ratio >= 2:
-        msg = "*{0}\n量比：{1:.2f}\t涨幅：{2}%\n".format(code_name, vol_ratio, p_change)
-        logging.debug(msg)
-        return True
-    else:
-        return False
+
+# check_volume按需使用预编译内核（见strategy/_aot.py）
+_check_volume = _aot.load('check_volume_nb', _check_volume_nb)
 
 
 # 量比大于3.0
@@ -1,8 +1,9 @@
 # -*- encoding: UTF-8 -*-
 
-import talib as tl
-import pandas as pd
+import numpy as np
 import logging
+import utils
+from strategy import _aot
 
 
 # 持续上涨（MA30向上）
@@ -10,20 +11,61 @@ def check(code_name, data, end_date=None, threshold=30):
     if len(data) < threshold:
         logging.debug("{0}:样本小于{1}天...\n".format(code_name, threshold))
         return
-    data['ma30'] = pd.Series(tl.MA(data['收盘'].values, 30), index=data.index.values)
 
-    if end_date is not None:
-        mask = (data['日期'] <= end_date)
-        data = data.loc[mask]
+    n = utils.end_index(data, end_date)
+    close = data['收盘'].to_numpy(dtype=np.float64)
+    # 与原先talib计算的MA30一致：收盘价中间缺失时之后的均线均为nan，不入选
+    if utils.has_gap(close[:n]):
+        return False
+    return _check(close, n, threshold)
+
+
+# check的按列版本，columns见data_fetcher.to_columns，返回每只股票是否入选
+def scan(columns, threshold=30):
+    # 需要threshold个交易日的MA30，首日的MA30再向前取29日
+    if threshold + 29 > columns['收盘'].shape[1]:
+        raise ValueError("threshold={}超出按列数据的窗口，请增大data_fetcher.to_columns的window".format(threshold))
+    return _scan(columns['收盘'], columns['end'], threshold) & ~columns['gaps']['收盘']
+
+
+# 逐只股票并行执行_check_nb
+@utils.njit(parallel=True, cache=True)
+def _scan_nb(close, end, threshold):
+    hits = np.zeros(len(end), dtype=np.bool_)
+    for s in utils.prange(len(end)):
+        hits[s] = _check_nb(close[s], end[s], threshold)
+    return hits
 
-    data = data.tail(n=threshold)
 
-    step1 = round(threshold/3)
-    step2 = round(threshold*2/3)
+# 按需使用预编译内核（见strategy/_aot.py），省去JIT编译时间
+_scan = _aot.load('scan_nb', _scan_nb)
 
-    if data.iloc[0]['ma30'] < data.iloc[step1]['ma30'] < \
-        data.iloc[step2]['ma30'] < data.iloc[-1]['ma30'] and data.iloc[-1]['ma30'] > 1.2*data.iloc[0]['ma30']:
-        return True
-    else:
+
+# 第i个交易日的N日均线，样本不足时为nan
+@utils.njit(cache=True)
+def _ma(values, i, days):
+    if i < days - 1:
+        return np.nan
+    total = 0.0
+    for j in range(i - days + 1, i + 1):
+        total += values[j]
+    return total / days
+
+
+# check的数值部分，只取前n个交易日
+@utils.njit(cache=True)
+def _check_nb(close, n, threshold):
+    if n < threshold:
         return False
+    start = n - threshold
+    step1 = round(threshold / 3)
+    step2 = round(threshold * 2 / 3)
+
+    ma_first = _ma(close, start, 30)
+    ma_last = _ma(close, n - 1, 30)
+    return ma_first < _ma(close, start + step1, 30) < _ma(close, start + step2, 30) < ma_last \
+        and ma_last > 1.2 * ma_first
+
 
+# check按需使用预编译内核（见strategy/_aot.py）
+_check = _aot.load('check_nb', _check_nb)
@@ -0,0 +1,166 @@
+# -*- encoding: UTF-8 -*-
+# numba版策略与原pandas实现的一致性测试，使用固定生成的行情数据，无需联网
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+import talib as tl
+
+import data_fetcher
+from strategy import enter, keep_increasing
+
+
+# 原pandas实现：放量上涨
+def reference_check_volume(code_name, data, end_date=None, threshold=60):
+    if len(data) < threshold:
+        return False
+    data['vol_ma5'] = pd.Series(tl.MA(data['成交量'].values, 5), index=data.index.values)
+    if end_date is not None:
+        data = data.loc[data['日期'] <= end_date]
+    if data.empty:
+        return False
+    p_change = data.iloc[-1]['p_change']
+    if p_change < 2 or data.iloc[-1]['收盘'] < data.iloc[-1]['开盘']:
+        return False
+    data = data.tail(n=threshold + 1)
+    if len(data) < threshold + 1:
+        return False
+    last_close = data.iloc[-1]['收盘']
+    last_vol = data.iloc[-1]['成交量']
+    if last_close * last_vol * 100 < 200000000:
+        return False
+    data = data.head(n=threshold)
+    return last_vol / data.iloc[-1]['vol_ma5'] >= 2
+
+
+# 原pandas实现：均线多头
+def reference_keep_increasing(code_name, data, end_date=None, threshold=30):
+    if len(data) < threshold:
+        return False
+    data['ma30'] = pd.Series(tl.MA(data['收盘'].values, 30), index=data.index.values)
+    if end_date is not None:
+        data = data.loc[data['日期'] <= end_date]
+    data = data.tail(n=threshold)
+    step1 = round(threshold / 3)
+    step2 = round(threshold * 2 / 3)
+    return data.iloc[0]['ma30'] < data.iloc[step1]['ma30'] < data.iloc[step2]['ma30'] < data.iloc[-1]['ma30'] \
+        and data.iloc[-1]['ma30'] > 1.2 * data.iloc[0]['ma30']
+
+
+def make_frame(close, vol, open_=None):
+    close = np.round(np.asarray(close, dtype=np.float64), 2)
+    if open_ is None:
+        open_ = close
+    start = datetime.date(2022, 1, 3)
+    data = pd.DataFrame({
+        '日期': [start + datetime.timedelta(days=i) for i in range(len(close))],
+        '开盘': np.round(np.asarray(open_, dtype=np.float64), 2),
+        '收盘': close,
+        '成交量': np.asarray(vol, dtype=np.float64),
+    })
+    data['p_change'] = tl.ROC(data['收盘'], 1)
+    return data
+
+
+def random_frames(count=300, seed=0):
+    rng = np.random.default_rng(seed)
+    frames = {}
+    for i in range(count):
+        n = int(rng.integers(20, 200))
+        close = np.cumprod(1 + rng.normal(0.004, 0.04, n)) * 10
+        open_ = close / (1 + rng.normal(0.01, 0.02, n))
+        vol = rng.integers(1000, 400000, n).astype(np.float64)
+        vol[-1] *= rng.choice([1, 5])
+        frames[('{:06d}'.format(i), '测试')] = make_frame(close, vol, open_)
+    return frames
+
+
+def boundary_frames():
+    frames = {}
+    # 涨幅(16.83-16.50)/16.50略小于2%，float64下不满足p_change>=2
+    close = np.full(80, 16.50)
+    close[-1] = 16.83
+    vol = np.full(80, 100000.0)
+    vol[-1] = 500000.0
+    frames[('000001', '涨幅临界')] = make_frame(close, vol)
+    # 成交额1.28*1562500*100恰为2亿
+    close = np.full(80, 1.20)
+    close[-1] = 1.28
+    vol = np.full(80, 300000.0)
+    vol[-1] = 1562500.0
+    frames[('000002', '成交额临界')] = make_frame(close, vol)
+    # 前5日中有一日成交量缺失，5日均量为nan，不满足量比条件
+    close = np.full(80, 10.0)
+    close[-1] = 10.5
+    vol = np.full(80, 300000.0)
+    vol[-1] = 1000000.0
+    vol[-3] = np.nan
+    frames[('000003', '成交量缺失')] = make_frame(close, vol)
+    # 成交量在窗口之前缺失，talib计算的5日均量之后均为nan，不满足量比条件
+    vol = np.full(80, 300000.0)
+    vol[-1] = 1000000.0
+    vol[10] = np.nan
+    frames[('000004', '早期成交量缺失')] = make_frame(close, vol)
+    # 持续上涨，但收盘价在窗口之前缺失，talib计算的MA30之后均为nan
+    close = np.linspace(10, 30, 80)
+    close[5] = np.nan
+    frames[('000005', '早期收盘价缺失')] = make_frame(close, np.full(80, 300000.0))
+    return frames
+
+
+FRAMES = {**random_frames(), **boundary_frames()}
+END_DATES = [None, datetime.date(2022, 2, 15), datetime.date(2022, 4, 1), datetime.date(2022, 6, 1)]
+
+
+@pytest.mark.parametrize('end_date', END_DATES)
+def test_check_volume(end_date):
+    for code_name, data in FRAMES.items():
+        assert bool(enter.check_volume(code_name, data.copy(), end_date)) == \
+            bool(reference_check_volume(code_name, data.copy(), end_date)), code_name
+
+
+@pytest.mark.parametrize('end_date', END_DATES)
+def test_keep_increasing(end_date):
+    for code_name, data in FRAMES.items():
+        assert bool(keep_increasing.check(code_name, data.copy(), end_date)) == \
+            bool(reference_keep_increasing(code_name, data.copy(), end_date)), code_name
+
+
+# 原实现在end_date之前不足21个交易日时抛出IndexError，numba版改为不入选
+def test_keep_increasing_short_history():
+    end_date = datetime.date(2022, 1, 8)
+    for code_name, data in FRAMES.items():
+        if len(data) < 30:  # 原实现在按日期截取之前已返回
+            continue
+        with pytest.raises(IndexError):
+            reference_keep_increasing(code_name, data.copy(), end_date)
+        assert not keep_increasing.check(code_name, data.copy(), end_date), code_name
+    columns = data_fetcher.to_columns(FRAMES, end_date)
+    assert not keep_increasing.scan(columns).any()
+
+
+@pytest.mark.parametrize('end_date', END_DATES)
+def test_scan_volume(end_date):
+    columns = data_fetcher.to_columns(FRAMES, end_date)
+    expected = [reference_check_volume(code_name, data.copy(), end_date) for code_name, data in FRAMES.items()]
+    assert enter.scan_volume(columns).tolist() == [bool(x) for x in expected]
+
+
+@pytest.mark.parametrize('end_date', END_DATES)
+def test_scan(end_date):
+    columns = data_fetcher.to_columns(FRAMES, end_date)
+    expected = [reference_keep_increasing(code_name, data.copy(), end_date) for code_name, data in FRAMES.items()]
+    assert keep_increasing.scan(columns).tolist() == [bool(x) for x in expected]
+
+
+# 窗口之外的threshold报错，而不是静默地全部不入选
+def test_scan_threshold_exceeds_window():
+    columns = data_fetcher.to_columns(FRAMES)
+    with pytest.raises(ValueError):
+        enter.scan_volume(columns, threshold=61)
+    with pytest.raises(ValueError):
+        keep_increasing.scan(columns, threshold=33)
+    wide = data_fetcher.to_columns(FRAMES, window=100)
+    expected = [reference_check_volume(code_name, data.copy(), threshold=90) for code_name, data in FRAMES.items()]
+    assert enter.scan_volume(wide, threshold=90).tolist() == [bool(x) for x in expected]
@@ -0,0 +1,74 @@
+# -*- encoding: UTF-8 -*-
+# check_enter的策略结果缓存测试，使用固定行情数据，无需联网
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import work_flow
+
+
+@pytest.fixture(autouse=True)
+def clear_verdicts():
+    work_flow._verdicts.clear()
+    yield
+    work_flow._verdicts.clear()
+
+
+def make_frame(close=10.0, vol=1000.0, days=5):
+    start = datetime.date(2022, 1, 3)
+    return pd.DataFrame({
+        '日期': [start + datetime.timedelta(days=i) for i in range(days)],
+        '收盘': np.full(days, close),
+        '成交量': np.full(days, vol),
+    })
+
+
+def counting_strategy(calls):
+    def strategy(code_name, data, end_date=None):
+        calls.append(code_name)
+        return True
+    return strategy
+
+
+def test_hit_when_last_bar_unchanged():
+    calls = []
+    m_filter = work_flow.check_enter(strategy_fun=counting_strategy(calls))
+    assert m_filter((('000001', '测试'), make_frame()))
+    assert m_filter((('000001', '测试'), make_frame()))
+    assert calls == [('000001', '测试')]
+
+
+@pytest.mark.parametrize('changed', [make_frame(close=10.5), make_frame(vol=2000.0), make_frame(days=6)])
+def test_miss_when_last_bar_changes(changed):
+    calls = []
+    m_filter = work_flow.check_enter(strategy_fun=counting_strategy(calls))
+    m_filter((('000001', '测试'), make_frame()))
+    m_filter((('000001', '测试'), changed))
+    assert len(calls) == 2
+
+
+def test_nan_last_close_hits():
+    calls = []
+    m_filter = work_flow.check_enter(strategy_fun=counting_strategy(calls))
+    m_filter((('000001', '测试'), make_frame(close=np.nan)))
+    m_filter((('000001', '测试'), make_frame(close=np.nan)))
+    assert len(calls) == 1
+    assert len(work_flow._verdicts) == 1
+
+
+def test_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(work_flow, 'MAX_CACHED_VERDICTS', 2)
+    calls = []
+    m_filter = work_flow.check_enter(strategy_fun=counting_strategy(calls))
+    for code in ('000001', '000002'):
+        m_filter(((code, '测试'), make_frame()))
+    m_filter((('000001', '测试'), make_frame()))  # 000001变为最近使用
+    m_filter((('000003', '测试'), make_frame()))  # 淘汰000002
+    assert len(work_flow._verdicts) == 2
+
+    calls.clear()
+    m_filter((('000001', '测试'), make_frame()))
+    m_filter((('000002', '测试'), make_frame()))
+    assert calls == [('000002', '测试')]
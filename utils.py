@@ -1,7 +1,33 @@
 # -*- coding: UTF-8 -*-
 import datetime
 
+import numpy as np
+
+# numba为可选依赖，未安装时退化为普通Python函数
+try:
+    from numba import njit, prange
+except ImportError:
+    prange = range
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
 
 # 是否是工作日
 def is_weekday():
-    return datetime.datetime.today().weekday() < 5
\ No newline at end of file
+    return datetime.datetime.today().weekday() < 5
+
+
+# end_date当日及之前的交易日数量，等价于len(data.loc[data['日期'] <= end_date])
+def end_index(data, end_date=None):
+    if end_date is None:
+        return len(data)
+    return int(np.count_nonzero((data['日期'] <= end_date).to_numpy()))
+
+
+# 首个有效值之后是否出现nan；talib的均线遇到这样的nan后，之后的值全部为nan
+def has_gap(values):
+    missing = np.isnan(values)
+    return missing.size > 0 and bool(missing[np.argmin(missing):].any())
@@ -1,9 +1,11 @@
 # -*- encoding: UTF-8 -*-
 
+import collections
 import datetime
 import logging
 
 import akshare as ak
+import numpy as np
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -23,6 +25,15 @@ from strategy import (
     climax_limitdown,
 )
 
+# Maximum characters per push; longer output is split into several pushes
+MAX_PUSH_LENGTH = 20000
+
+# Strategies that can be evaluated over the shared columnar store
+COLUMNAR_STRATEGIES = {
+    enter.check_volume: enter.scan_volume,
+    keep_increasing.check: keep_increasing.scan,
+}
+
 
 def get_retry_session():
     """Create a requests session with retry logic for robust handling of network issues."""
@@ -39,7 +50,6 @@ def get_retry_session():
 
 def fetch_data_with_retry():
     """Fetch stock data with retry logic."""
-    session = get_retry_session()
     try:
         return ak.stock_zh_a_spot_em()  # Fetch real-time stock data
     except Exception as e:
@@ -51,8 +61,9 @@ def prepare():
     """Initialize data processing and execute stock strategies."""
     logging.info("************************ process start ***************************************")
     all_data = fetch_data_with_retry()  # Fetch all stock data
-    subset = all_data[['代码', '名称']]
-    stocks = [tuple(row) for row in subset.values]
+    stocks = list(zip(all_data['代码'].tolist(), all_data['名称'].tolist()))
+
+    stock_info = build_stock_info(all_data)  # Map stock code to name
 
     statistics(all_data, stocks)  # Generate initial statistics
 
@@ -73,81 +84,168 @@ def prepare():
     if datetime.datetime.now().weekday() == 0:
         strategies['均线多头'] = keep_increasing.check
 
-    process(stocks, strategies)  # Process stocks with strategies
+    process(stocks, strategies, stock_info)  # Process stocks with strategies
     logging.info("************************ process end ***************************************")
 
 
-def process(stocks, strategies):
-    """Process stocks using defined strategies and analyze signals."""
-    stocks_data = data_fetcher.run(stocks)  # Fetch detailed stock data
-    strategy_results = {strategy: check(stocks_data, strategy, func) for strategy, func in strategies.items()}
-
-    analyze_signals(strategy_results)  # Analyze signals from strategies
+def build_stock_info(all_data):
+    """Map stock codes to names from the spot-market snapshot."""
+    return dict(zip(all_data['代码'].to_numpy(), all_data['名称'].to_numpy()))
 
 
-def analyze_signals(strategy_results):
-    """Analyze and classify stock signals from strategy results."""
+def process(stocks, strategies, stock_info=None):
+    """Process stocks using defined strategies and analyze signals."""
+    stocks_data = data_fetcher.run(stocks)  # Fetch detailed stock data
+    stocks_data = listed_before(stocks_data, settings.config['end_date'])  # Drop stocks not yet listed
+
+    columns = None
+    if any(func in COLUMNAR_STRATEGIES for func in strategies.values()):
+        columns = data_fetcher.to_columns(stocks_data, settings.config['end_date'])  # Shared columnar store
+    strategy_results = {strategy: check(stocks_data, func, columns) for strategy, func in strategies.items()}
+
+    # Messages for this run, pushed together once processing is done
+    messages = []
+    for strategy in strategies:  # Report in strategy definition order
+        if strategy_results[strategy]:
+            messages.append(
+                f'**************"{strategy}"**************\n{strategy_results[strategy]}'
+                f'\n**************"{strategy}"**************\n'
+            )
+
+    if stock_info is None:
+        stock_info = build_stock_info(fetch_data_with_retry())  # Only fetch when the caller has no snapshot
+    messages += analyze_signals(strategy_results, stock_info)  # Analyze signals from strategies
+    flush_messages(messages)  # Push all strategy messages at once
+
+
+def analyze_signals(strategy_results, stock_info):
+    """Analyze and classify stock signals from strategy results, returning the messages to push."""
+    result_sets = {strategy: set(stocks) for strategy, stocks in strategy_results.items()}
     signals = {
-        "强烈趋势信号": strong_trend_signal(strategy_results),
-        "回调低吸信号": pullback_buy_signal(strategy_results),
-        "短线突破机会": short_term_breakout_signal(strategy_results),
+        "强烈趋势信号": strong_trend_signal(result_sets),
+        "回调低吸信号": pullback_buy_signal(result_sets),
+        "短线突破机会": short_term_breakout_signal(result_sets),
     }
 
+    messages = []
     for signal_name, stocks in signals.items():
         if stocks:
-            classified = classify_by_exchange(stocks, all_data=fetch_data_with_retry())
-            push.strategy(f"{signal_name}的股票分类：\n{classified}")
+            classified = classify_by_exchange(stocks, stock_info)
+            messages.append(f"{signal_name}的股票分类：\n{classified}")
         else:
-            push.strategy(f"{signal_name}的股票不存在。")
+            messages.append(f"{signal_name}的股票不存在。")
+    return messages
+
+
+def flush_messages(messages):
+    """Send strategy messages in as few pushes as possible."""
+    batch, size = [], 0
+    for msg in messages:
+        if batch and size + len(msg) > MAX_PUSH_LENGTH:
+            push.strategy("\n\n".join(batch))
+            batch, size = [], 0
+        batch.append(msg)
+        size += len(msg) + 2
+    if batch:
+        push.strategy("\n\n".join(batch))
 
 
-def check(stocks_data, strategy, strategy_func):
+def check(stocks_data, strategy_func, columns=None):
     """Check stocks against a specific strategy and return matching stocks."""
-    end = settings.config['end_date']
-    m_filter = check_enter(end_date=end, strategy_fun=strategy_func)
-    results = dict(filter(m_filter, stocks_data.items()))
+    scan = COLUMNAR_STRATEGIES.get(strategy_func)
+    if scan is not None and columns is not None:
+        hits = scan(columns)
+        results = [columns['code_names'][i] for i in np.flatnonzero(hits)]
+    else:
+        end = settings.config['end_date']
+        m_filter = check_enter(end_date=end, strategy_fun=strategy_func)
+        results = [code_name for code_name, data in stocks_data.items() if m_filter((code_name, data))]
+    return results
+
+
+def listed_before(stocks_data, end_date=None):
+    """Keep only stocks that were already listed on ``end_date``."""
+    if not end_date:
+        return stocks_data
+
+    listed = {}
+    for code_name, data in stocks_data.items():
+        if end_date < data['日期'].iat[0]:
+            logging.debug(f"{code_name}在{end_date}时还未上市")
+        else:
+            listed[code_name] = data
+    return listed
+
+
+# Per-stock strategy verdicts, so repeated runs skip stocks whose last bar is unchanged.
+# The cache lives in the process: with cron disabled main.py calls prepare() once and exits,
+# so it only pays off in cron mode when the job runs again before the last bar changes.
+# The key only covers the stock's own quotes, not global inputs such as settings.top_list
+# (read by high_tight_flag); cached verdicts are not invalidated when those change.
+_verdicts = collections.OrderedDict()
+MAX_CACHED_VERDICTS = 100_000
 
-    if results:
-        push.strategy(
-            f'**************"{strategy}"**************\n{list(results.keys())}\n**************"{strategy}"**************\n'
-        )
-    return list(results.keys())
+
+def _key_value(value):
+    """Map NaN/NaT to None so a missing quote still matches its own cache key."""
+    return None if value != value else value
 
 
 def check_enter(end_date=None, strategy_fun=enter.check_volume):
     """Create a filter function to check stock entry criteria."""
 
     def end_date_filter(stock_data):
-        if end_date and end_date < stock_data[1].iloc[0].日期:
-            logging.debug(f"{stock_data[0]}在{end_date}时还未上市")
-            return False
-        return strategy_fun(stock_data[0], stock_data[1], end_date=end_date)
+        code_name, data = stock_data
+        key = (strategy_fun, end_date, code_name, _key_value(data['日期'].iat[-1]),
+               _key_value(data['收盘'].iat[-1]), _key_value(data['成交量'].iat[-1]))
+        if key in _verdicts:
+            _verdicts.move_to_end(key)
+            return _verdicts[key]
+
+        verdict = bool(strategy_fun(code_name, data, end_date=end_date))
+        _verdicts[key] = verdict
+        if len(_verdicts) > MAX_CACHED_VERDICTS:
+            _verdicts.popitem(last=False)
+        return verdict
 
     return end_date_filter
 
 
-def strong_trend_signal(strategy_results):
+def intersect(result_sets, *strategies):
+    """Return stocks selected by every one of the given strategies."""
+    operands = [result_sets.get(strategy) for strategy in strategies]
+    if not all(operands):  # Any empty operand makes the intersection empty
+        return []
+    operands.sort(key=len)  # Start from the smallest set
+    return list(operands[0].intersection(*operands[1:]))
+
+
+def strong_trend_signal(result_sets):
     """Identify stocks with strong trend signals."""
-    return list(set(strategy_results.get('放量上涨', [])) &
-                set(strategy_results.get('均线多头', [])) &
-                set(strategy_results.get('突破平台', [])))
+    return intersect(result_sets, '放量上涨', '均线多头', '突破平台')
 
 
-def pullback_buy_signal(strategy_results):
+def pullback_buy_signal(result_sets):
     """Identify stocks suitable for pullback buying."""
-    return list(set(strategy_results.get('回踩年线', [])) &
-                set(strategy_results.get('均线多头', [])) &
-                set(strategy_results.get('无大幅回撤', [])))
+    return intersect(result_sets, '回踩年线', '均线多头', '无大幅回撤')
 
 
-def short_term_breakout_signal(strategy_results):
+def short_term_breakout_signal(result_sets):
     """Identify stocks with short-term breakout opportunities."""
-    return list(set(strategy_results.get('放量上涨', [])) &
-                set(strategy_results.get('停机坪', [])) &
-                set(strategy_results.get('高而窄的旗形', [])))
+    return intersect(result_sets, '放量上涨', '停机坪', '高而窄的旗形')
+
 
+# Stock code prefix -> exchange; prefixes do not overlap
+EXCHANGE_PREFIXES = {
+    "60": "上交所",
+    "00": "深交所",
+    "8": "北交所",
+    "688": "科创板/创业板",
+    "300": "科创板/创业板",
+}
 
-def classify_by_exchange(stocks, all_data):
+
+def classify_by_exchange(stocks, stock_info):
     """Classify stocks by exchange based on their codes."""
     classified = {
         "上交所": [],
@@ -156,32 +254,27 @@ def classify_by_exchange(stocks, all_data):
         "科创板/创业板": [],
     }
 
-    stock_info = {row['代码']: row['名称'] for _, row in all_data.iterrows()}
-
     for stock_code in stocks:
         # Unpack the stock code safely
         stock_code = stock_code[0] if isinstance(stock_code, tuple) else stock_code
         name = stock_info.get(stock_code, "未知名称")
 
         # Classify based on stock code prefix
-        if stock_code.startswith("60"):
-            classified["上交所"].append(f"{stock_code} ({name})")
-        elif stock_code.startswith("00"):
-            classified["深交所"].append(f"{stock_code} ({name})")
-        elif stock_code.startswith("8"):
-            classified["北交所"].append(f"{stock_code} ({name})")
-        elif stock_code.startswith(("688", "300")):
-            classified["科创板/创业板"].append(f"{stock_code} ({name})")
+        exchange = (EXCHANGE_PREFIXES.get(stock_code[:3]) or EXCHANGE_PREFIXES.get(stock_code[:2])
+                    or EXCHANGE_PREFIXES.get(stock_code[:1]))
+        if exchange:
+            classified[exchange].append(f"{stock_code} ({name})")
 
     return classified
 
 
 def statistics(all_data, stocks):
     """Generate and push statistical data about stock performance."""
-    limitup = len(all_data[all_data['涨跌幅'] >= 9.5])  # Count limit up stocks
-    limitdown = len(all_data[all_data['涨跌幅'] <= -9.5])  # Count limit down stocks
-    up5 = len(all_data[all_data['涨跌幅'] >= 5])  # Count stocks with >5% increase
-    down5 = len(all_data[all_data['涨跌幅'] <= -5])  # Count stocks with < -5% decrease
+    pct = all_data['涨跌幅'].to_numpy(dtype=np.float64)
+    limitup = int(np.count_nonzero(pct >= 9.5))  # Count limit up stocks
+    limitdown = int(np.count_nonzero(pct <= -9.5))  # Count limit down stocks
+    up5 = int(np.count_nonzero(pct >= 5))  # Count stocks with >5% increase
+    down5 = int(np.count_nonzero(pct <= -5))  # Count stocks with < -5% decrease
 
     # Prepare the statistics message
     msg = (f"涨停数：{limitup}   跌停数：{limitdown}\n"